@@ -1,11 +1,12 @@
 # app.py
 import streamlit as st
 import pandas as pd
-from pysat.formula import CNF
-from pysat.solvers import Solver
 from io import BytesIO, StringIO
+from concurrent.futures import ThreadPoolExecutor, wait
 import os
 
+from scheduler_core import *
+
 # -------------------- APP CONFIG --------------------
 st.set_page_config(
     page_title="Course Scheduler",
@@ -14,104 +15,62 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# -------------------- USER DATABASE --------------------
-# For demo: hardcoded users (replace with DB in production)
-USERS = {
-    "faculty1": {"password": "pass123", "role": "Faculty"},
-    "faculty2": {"password": "pass456", "role": "Faculty"},
-    "admin": {"password": "admin123", "role": "Admin"},
-    "demo_faculty": {"password": "demo", "role": "Faculty"}  # Demo account
-}
-
 # -------------------- SESSION STATE --------------------
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
     st.session_state.role = None
     st.session_state.username = None
 
-# -------------------- LOGIN FUNCTION --------------------
-def login(username, password):
-    if username in USERS and USERS[username]["password"] == password:
-        st.session_state.logged_in = True
-        st.session_state.role = USERS[username]["role"]
-        st.session_state.username = username
-        return True
-    return False
-
-def logout():
-    st.session_state.logged_in = False
-    st.session_state.role = None
-    st.session_state.username = None
-
-# -------------------- SAT Solver Logic --------------------
-def generate_timetable(data):
-    courses = data["Course"].astype(str).tolist()
-    faculty_map = dict(zip(data["Course"].astype(str), data["Faculty"].astype(str)))
-    preferences = {}  # per-course preferences
-    all_slots = set()
-
-    # Collect preferences per course
-    for _, row in data.iterrows():
-        course = str(row["Course"])
-        raw_slots = str(row["PreferredSlots"]).strip() if pd.notna(row["PreferredSlots"]) else ""
-        if raw_slots:
-            pref_list = [s.strip() for s in raw_slots.split(",") if s.strip()]
-        else:
-            pref_list = []
-        preferences[course] = pref_list
-        all_slots.update(pref_list)
-
-    # Fallback for courses with no preferences
-    for c in courses:
-        if c not in preferences or not preferences[c]:
-            preferences[c] = ["Unassigned"]
-            all_slots.add("Unassigned")
-
-    slots = sorted(list(all_slots))
-
-    # Map (course, slot) -> SAT variable
-    var_map = {}
-    counter = 1
-    for c in courses:
-        for s in slots:
-            var_map[(c, s)] = counter
-            counter += 1
-
-    cnf = CNF()
-
-    # Each course in at least one preferred slot
-    for c in courses:
-        pref_vars = [var_map[(c, s)] for s in preferences[c] if (c, s) in var_map]
-        if pref_vars:
-            cnf.append(pref_vars)
-
-    # At most one slot per course
-    for c in courses:
-        for i in range(len(slots)):
-            for j in range(i+1, len(slots)):
-                cnf.append([-var_map[(c, slots[i])], -var_map[(c, slots[j])]])
-
-    # No professor clash
-    for s in slots:
-        prof_courses = {}
-        for c in courses:
-            p = faculty_map[c]
-            prof_courses.setdefault(p, []).append(c)
-        for p, pcourses in prof_courses.items():
-            for i in range(len(pcourses)):
-                for j in range(i+1, len(pcourses)):
-                    cnf.append([-var_map[(pcourses[i], s)], -var_map[(pcourses[j], s)]])
-
-    with Solver(bootstrap_with=cnf) as solver:
-        if solver.solve():
-            model = solver.get_model()
-            timetable = []
-            for (c, s), var in var_map.items():
-                if var in model:
-                    timetable.append({"Course": c, "Faculty": faculty_map[c], "Slot": s})
-            return pd.DataFrame(timetable)
-        else:
-            return None
+# Solves run on a per-session worker thread so the UI stays live meanwhile
+if "executor" not in st.session_state:
+    st.session_state.executor = ThreadPoolExecutor(max_workers=1)
+    st.session_state.timetable_future = None
+
+# -------------------- DATA LOADING --------------------
+# Parse + clean, keyed on the raw bytes so Streamlit reruns skip redoing
+# either for the same file
+@st.cache_data(show_spinner=False)
+def load_csv(file_bytes):
+    data = pd.read_csv(BytesIO(file_bytes))
+    data["Course"] = data["Course"].astype(str).str.strip()
+    data["Faculty"] = data["Faculty"].astype(str).str.strip()
+    data["PreferredSlots"] = data["PreferredSlots"].astype(str).str.strip()
+    return data
+
+# The bundled demo file doesn't change while the app runs; read it once
+@st.cache_data(show_spinner=False)
+def _read_demo_csv(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+# Static read-only sample, built once per server process
+@st.cache_resource
+def _sample_timetable():
+    return pd.DataFrame({
+        "Course": ["CS101", "CS102", "CS103"],
+        "Faculty": ["Prof_A", "Prof_B", "Prof_A"],
+        "Slot": ["Mon_9", "Mon_10", "Tue_9"]
+    })
+
+# -------------------- EXPORT --------------------
+# Cached so download-button reruns don't re-serialize an unchanged timetable
+@st.cache_data(show_spinner=False)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(show_spinner=False)
+def to_excel_bytes(df):
+    # constant_memory flushes each row as it is written, so rows must arrive in
+    # order; pandas' writer goes column by column, so write them directly
+    import xlsxwriter  # only needed once a timetable is exported
+
+    buf = BytesIO()
+    with xlsxwriter.Workbook(buf, {"constant_memory": True}) as workbook:
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, df.columns.tolist())
+        for r, row in enumerate(df.itertuples(index=False), start=1):
+            sheet.write_row(r, 0, row)
+    return buf.getvalue()
 
 # -------------------- LOGIN PAGE --------------------
 if not st.session_state.logged_in:
@@ -143,13 +102,7 @@ if not st.session_state.logged_in:
     st.markdown("---")
     st.subheader("🔍 Or view a read-only sample timetable")
     if st.button("View Sample Timetable (read-only)"):
-
-        sample = pd.DataFrame({
-            "Course": ["CS101", "CS102", "CS103"],
-            "Faculty": ["Prof_A", "Prof_B", "Prof_A"],
-            "Slot": ["Mon_9", "Mon_10", "Tue_9"]
-        })
-        st.dataframe(sample)
+        st.dataframe(_sample_timetable())
         st.info("This is a static sample. Use Demo login to try generating your own timetable.")
 
 else:
@@ -164,53 +117,57 @@ else:
         st.title("📅 Faculty Timetable Submission")
         st.markdown("Upload your **course preferences** in CSV format or use the built-in demo dataset.")
 
-        uploaded_file = st.file_uploader("Upload Faculty Preferences (CSV)", type=["csv"])
+        uploaded_file = st.file_uploader("Upload Faculty Preferences (CSV)", type=["csv"], on_change=clear_timetable)
 
         if uploaded_file:
-            # Case 1: user uploaded a file → clean it
-            data = pd.read_csv(uploaded_file)
-            data["Course"] = data["Course"].astype(str).str.strip()
-            data["Faculty"] = data["Faculty"].astype(str).str.strip()
-            data["PreferredSlots"] = data["PreferredSlots"].astype(str).str.strip()
+            # Case 1: user uploaded a file (cleaned inside load_csv)
+            data = load_csv(uploaded_file.getvalue())
             st.write("Uploaded Preferences Preview:", data)
         else:
             # Case 2: demo fallback → load repo CSV
             st.info("No file uploaded. Using sample preferences.csv from repo.")
             try:
                 repo_csv_path = os.path.join(os.path.dirname(__file__), "preferences.csv")
-                data = pd.read_csv(repo_csv_path)
-                data["Course"] = data["Course"].astype(str).str.strip()
-                data["Faculty"] = data["Faculty"].astype(str).str.strip()
-                data["PreferredSlots"] = data["PreferredSlots"].astype(str).str.strip()
+                csv_bytes = _read_demo_csv(repo_csv_path)
+                data = load_csv(csv_bytes)
                 st.write("Sample Preferences Preview:", data)
 
                 # Add download button (serve raw file bytes)
-                with open(repo_csv_path, "rb") as f:
-                    st.download_button(
-                        label="⬇ Download Sample Preferences CSV",
-                        data=f.read(),
-                        file_name="preferences.csv",
-                        mime="text/csv"
-                    )
+                st.download_button(
+                    label="⬇ Download Sample Preferences CSV",
+                    data=csv_bytes,
+                    file_name="preferences.csv",
+                    mime="text/csv"
+                )
             except Exception as e:
                 st.error(f"⚠ Could not load demo CSV: {e}")
                 data = None
 
         # Generate timetable button
         if data is not None and st.button("Generate Timetable", type="primary"):
-            timetable_df = generate_timetable(data)
+            # Only the solver's inputs, so extra CSV columns don't bust the cache
+            solver_input = data[["Course", "Faculty", "PreferredSlots"]].reset_index(drop=True)
+            st.session_state.timetable_future = st.session_state.executor.submit(
+                generate_timetable, solver_input
+            )
+
+        # Poll the background solve; each rerun only blocks briefly
+        future = st.session_state.timetable_future
+        if future is not None and not future.done():
+            with st.spinner("Solving timetable constraints..."):
+                wait([future], timeout=0.5)
+            if not future.done():
+                st.rerun()
+
+        if future is not None:
+            timetable_df = future.result()
             if timetable_df is not None:
                 st.success("✅ Timetable generated successfully!")
                 st.dataframe(timetable_df)
 
                 # Export options
-                csv_export = timetable_df.to_csv(index=False).encode('utf-8')
-                excel_buffer = BytesIO()
-                timetable_df.to_excel(excel_buffer, index=False, engine="openpyxl")
-                excel_data = excel_buffer.getvalue()
-
-                st.download_button("⬇ Download CSV", csv_export, "timetable.csv", "text/csv")
-                st.download_button("⬇ Download Excel", excel_data, "timetable.xlsx", "application/vnd.ms-excel")
+                st.download_button("⬇ Download CSV", to_csv_bytes(timetable_df), "timetable.csv", "text/csv")
+                st.download_button("⬇ Download Excel", to_excel_bytes(timetable_df), "timetable.xlsx", "application/vnd.ms-excel")
             else:
                 st.error("❌ No valid timetable found for given constraints")
 
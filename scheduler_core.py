@@ -0,0 +1,236 @@
+# scheduler_core.py
+import streamlit as st
+import pandas as pd
+import numpy as np
+import hashlib
+import hmac
+import os
+import re
+from collections import defaultdict
+
+__all__ = [
+    "USERS",
+    "login",
+    "logout",
+    "clear_timetable",
+    "generate_timetable",
+]
+
+# -------------------- USER DATABASE --------------------
+# For demo: hardcoded users (replace with DB in production)
+USERS = {
+    "faculty1": {"password": "pass123", "role": "Faculty"},
+    "faculty2": {"password": "pass456", "role": "Faculty"},
+    "admin": {"password": "admin123", "role": "Admin"},
+    "demo_faculty": {"password": "demo", "role": "Faculty"}  # Demo account
+}
+
+# Password digests computed once at import; login only hashes the attempt
+USERS_HASHED = {
+    u: {"pw": hashlib.sha256(v["password"].encode()).digest(), "role": v["role"]}
+    for u, v in USERS.items()
+}
+
+# -------------------- LOGIN FUNCTION --------------------
+def login(username, password):
+    user = USERS_HASHED.get(username)
+    if user and hmac.compare_digest(user["pw"], hashlib.sha256(password.encode()).digest()):
+        st.session_state.logged_in = True
+        st.session_state.role = user["role"]
+        st.session_state.username = username
+        return True
+    return False
+
+def logout():
+    st.session_state.logged_in = False
+    st.session_state.role = None
+    st.session_state.username = None
+    clear_timetable()
+
+def clear_timetable():
+    st.session_state.timetable_future = None
+
+# -------------------- SAT Solver Logic --------------------
+# pysat backend, overridable via the SAT_SOLVER env var (e.g. "g4", "cd19").
+# Minicard handles at-most-one natively as a cardinality constraint; other
+# backends fall back to the CNF encodings below
+SAT_SOLVER = os.environ.get("SAT_SOLVER", "mc")
+# Groups larger than this use the sequential counter instead of pairwise clauses
+AMO_PAIRWISE_LIMIT = 5
+# Splits "Mon_9 , Tue_9" into tokens with the surrounding whitespace removed
+_PREF_RE = re.compile(r"\s*,\s*")
+
+def amo_sequential(lits, next_var):
+    # Sinz sequential counter over n literals with auxiliaries
+    # s_i = next_var + i; returns its 3n - 4 binary clauses as an int32 array
+    x = np.asarray(lits, dtype=np.int32)
+    aux = np.arange(next_var, next_var + len(x) - 1, dtype=np.int32)
+    return np.concatenate((
+        [[-x[0], aux[0]]],
+        np.column_stack((-x[1:-1], aux[1:])),
+        np.column_stack((-aux[:-1], aux[1:])),
+        np.column_stack((-x[1:-1], -aux[:-1])),
+        [[-x[-1], -aux[-1]]],
+    )).astype(np.int32)
+
+def pairwise_amo(var_rows):
+    # Pairwise at-most-one clauses for every row of a (k, n) var array at once
+    ii, jj = np.triu_indices(var_rows.shape[1], k=1)
+    return np.stack((-var_rows[:, ii], -var_rows[:, jj]), axis=-1).reshape(-1, 2)
+
+def add_amo_groups(groups, solver, next_var):
+    # At most one true literal per group. Every clause of both encodings is
+    # binary, so they are all written into one int32 buffer sized up front and
+    # handed to the solver in a single call. Returns the next free variable id.
+    if solver.supports_atmost():
+        for lits in groups:
+            if len(lits) > 1:
+                solver.add_atmost(lits, 1)
+        return next_var
+
+    buckets = {}
+    sequential = []
+    for lits in groups:
+        if len(lits) > AMO_PAIRWISE_LIMIT:
+            sequential.append(lits)
+        elif len(lits) > 1:
+            buckets.setdefault(len(lits), []).append(lits)
+
+    total = (sum(len(b) * n * (n - 1) // 2 for n, b in buckets.items())
+             + sum(3 * len(lits) - 4 for lits in sequential))
+    clauses = np.empty((total, 2), dtype=np.int32)
+    pos = 0
+    for b in buckets.values():
+        chunk = pairwise_amo(np.array(b, dtype=np.int32))
+        clauses[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+    for lits in sequential:
+        chunk = amo_sequential(lits, next_var)
+        next_var += len(lits) - 1
+        clauses[pos:pos + len(chunk)] = chunk
+        pos += len(chunk)
+    solver.append_formula(clauses.tolist())
+    return next_var
+
+@st.cache_data(show_spinner=False)
+def generate_timetable(data):
+    # Imported here so pages that never solve don't pay for loading pysat
+    from pysat.solvers import Solver
+
+    # One grouped pass yields courses, faculty_map and preferences; repeated
+    # course rows collapse to their last occurrence
+    by = data.assign(
+        Course=data["Course"].astype(str),
+        Faculty=data["Faculty"].astype(str),
+        prefs=data["PreferredSlots"].fillna("").astype(str).str.strip().str.split(_PREF_RE),
+    ).groupby("Course", sort=False).agg(Faculty=("Faculty", "last"), prefs=("prefs", "last"))
+    courses = by.index.tolist()
+    faculty_map = by["Faculty"].to_dict()
+    preferences = {  # per-course preferences
+        c: list(dict.fromkeys(x for x in xs if x)) for c, xs in by["prefs"].items()
+    }
+    all_slots = set().union(*preferences.values())
+
+    # Fallback for courses with no preferences
+    # (the groupby gives every course a list, so no membership probe is needed)
+    for c, prefs in preferences.items():
+        if not prefs:
+            preferences[c] = ["Unassigned"]
+            all_slots.add("Unassigned")
+
+    # Faculty -> course rows, grouped once and shared by every per-professor step
+    prof_rows = defaultdict(list)
+    for i, c in enumerate(courses):
+        prof_rows[faculty_map[c]].append(i)
+    # A professor with a single course can never clash with themselves
+    multi_prof_rows = [rows for rows in prof_rows.values() if len(rows) >= 2]
+
+    # Pigeonhole: a professor with more courses than distinct candidate slots
+    # can never be scheduled, so skip the solver entirely
+    for rows in multi_prof_rows:
+        if len(rows) > len(set().union(*(preferences[courses[i]] for i in rows))):
+            return None
+
+    # Greedy first-fit: most inputs are satisfied by giving each course its
+    # earliest preference its professor hasn't used yet, with no solver needed
+    taken = set()
+    greedy_slots = []
+    for c in courses:
+        slot = next((s for s in preferences[c] if (faculty_map[c], s) not in taken), None)
+        if slot is None:
+            break
+        taken.add((faculty_map[c], slot))
+        greedy_slots.append(slot)
+    else:
+        return pd.DataFrame({
+            "Course": courses,
+            "Faculty": [faculty_map[c] for c in courses],
+            "Slot": greedy_slots
+        })
+
+    slots = sorted(list(all_slots))
+    slot_idx = {s: j for j, s in enumerate(slots)}
+
+    # (course_idx, slot_idx) -> SAT variable; 0 marks a non-preferred slot
+    preferred = np.zeros((len(courses), len(slots)), dtype=bool)
+    pref_rows = np.repeat(np.arange(len(courses)), [len(preferences[c]) for c in courses])
+    pref_cols = np.fromiter((slot_idx[s] for c in courses for s in preferences[c]), dtype=np.intp)
+    preferred[pref_rows, pref_cols] = True
+    var_map = np.zeros(preferred.shape, dtype=np.int32)
+    n_primary = int(preferred.sum())
+    var_map[preferred] = np.arange(1, n_primary + 1, dtype=np.int32)
+    counter = n_primary + 1  # auxiliaries are numbered after the primary vars
+
+    # Clauses go straight into the solver; no intermediate CNF object
+    with Solver(name=SAT_SOLVER) as solver:
+        course_vars = [row[row > 0].tolist() for row in var_map]
+        # Each course in at least one preferred slot
+        solver.append_formula(course_vars)
+
+        # No professor clash: one group per (professor, slot) column
+        clash_groups = []
+        for rows in multi_prof_rows:
+            block = var_map[rows]
+            for j in np.flatnonzero((block > 0).sum(axis=0) > 1):
+                col = block[:, j]
+                clash_groups.append(col[col > 0].tolist())
+
+        # At most one slot per course, at most one course per (professor, slot)
+        counter = add_amo_groups(course_vars + clash_groups, solver, counter)
+
+        # Symmetry breaking: same-faculty courses with identical preferences are
+        # interchangeable, so force them into strictly increasing slot order
+        twins = {}
+        for i, c in enumerate(courses):
+            twins.setdefault((faculty_map[c], frozenset(preferences[c])), []).append(i)
+        sym_clauses = []
+        for rows in twins.values():
+            if len(rows) < 2:
+                continue
+            block = var_map[rows][:, preferred[rows[0]]]  # (k, n), slot order
+            # course k+1 in slot p forbids course k in any slot q > p; q == p is
+            # already excluded by the professor-clash constraint
+            pp, qq = np.triu_indices(block.shape[1], k=1)
+            sym_clauses.extend(
+                np.stack((-block[1:, pp], -block[:-1, qq]), axis=-1).reshape(-1, 2).tolist()
+            )
+        solver.append_formula(sym_clauses)
+
+        # Bias the search toward each course's first-choice slot
+        solver.set_phases(
+            [int(var_map[i, slot_idx[preferences[c][0]]]) for i, c in enumerate(courses)]
+        )
+
+        if solver.solve():
+            model = solver.get_model()
+            # Only primary (course, slot) vars matter; skip the AMO auxiliaries
+            positive = np.fromiter((v for v in model if 0 < v <= n_primary), dtype=np.int32)
+            rows, cols = np.nonzero(np.isin(var_map, positive))
+            course_col = [courses[i] for i in rows.tolist()]
+            return pd.DataFrame({
+                "Course": course_col,
+                "Faculty": [faculty_map[c] for c in course_col],
+                "Slot": [slots[j] for j in cols.tolist()]
+            })
+        else:
+            return None